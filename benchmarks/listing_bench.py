@@ -0,0 +1,75 @@
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+import httpx
+import uvicorn
+
+from src import base_init, config
+
+SIZES = [100, 10_000, 100_000]
+ENCODINGS = ["identity", "gzip", "br"]
+REPEATS = 3
+PORT = 8765
+
+# The listing is requested many times from one client, lift its rate limit
+config.RATE_LIMITS["GET /item"] = (1e9, 10 ** 9)
+
+
+def _fill(db_file: Path, start: int, stop: int) -> None:
+    now = datetime.now().isoformat()
+    with sqlite3.connect(db_file) as conn:
+        conn.executemany("INSERT OR IGNORE INTO tags (tag_id) VALUES (?)", [(i,) for i in range(10)])
+        conn.executemany(
+            "INSERT INTO items (item_id, owner_id, content, price, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            [(i, i % 100, f"Some info about item {i}", i % 1000 + 0.99, now, now) for i in range(start, stop)])
+        conn.executemany(
+            "INSERT INTO item_tags (banner_id, tag_id) VALUES (?, ?)",
+            [(i, tag_id) for i in range(start, stop) for tag_id in (i % 10, (i + 1) % 10)])
+
+
+def _measure(client: httpx.Client, encoding: str) -> tuple[int, float]:
+    latencies = []
+    wire_bytes = 0
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        response = client.get("/item", headers={"Accept-Encoding": encoding})
+        response.read()
+        latencies.append(time.perf_counter() - start)
+        wire_bytes = response.num_bytes_downloaded
+        assert response.status_code == 200
+    return wire_bytes, statistics.median(latencies)
+
+
+def main() -> None:
+    db_file = Path(tempfile.mkdtemp()) / "bench.sqlite"
+    base_init(db_file)
+    from main import app
+
+    server = uvicorn.Server(uvicorn.Config(app, port=PORT, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+
+    print(f"{'items':>8} {'encoding':>9} {'bytes on wire':>14} {'latency, ms':>12}")
+    filled = 0
+    with httpx.Client(base_url=f"http://127.0.0.1:{PORT}", timeout=None) as client:
+        for size in SIZES:
+            _fill(db_file, filled, size)
+            filled = size
+            for encoding in ENCODINGS:
+                wire_bytes, latency = _measure(client, encoding)
+                print(f"{size:>8} {encoding:>9} {wire_bytes:>14} {latency * 1000:>12.1f}")
+
+    server.should_exit = True
+    thread.join()
+
+
+if __name__ == '__main__':
+    main()
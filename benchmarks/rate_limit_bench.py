@@ -0,0 +1,51 @@
+import asyncio
+import time
+
+from fastapi import FastAPI
+
+from src.rate_limit import Budget, MemoryStore, RateLimitMiddleware
+
+REQUESTS = 200_000
+CLIENTS = 10_000
+
+
+async def _app(scope, receive, send) -> None:
+    pass
+
+
+# Routes of the real app, which the limiter matches requests against
+app = FastAPI()
+for path in ["/user", "/user/{user_id}", "/admin", "/item", "/item/{item_id}"]:
+    app.add_api_route(path, _app, methods=["GET"])
+
+
+def _scope(client: int) -> dict:
+    return {
+        "app": app,
+        "type": "http",
+        "method": "GET",
+        "path": "/item",
+        "headers": [(b"host", b"test"), (b"token", f"token-{client}".encode())],
+        "client": ("127.0.0.1", 5000),
+    }
+
+
+async def _run(app, scopes: list[dict]) -> float:
+    start = time.perf_counter()
+    for scope in scopes:
+        await app(scope, None, None)
+    return time.perf_counter() - start
+
+
+async def main() -> None:
+    scopes = [_scope(i % CLIENTS) for i in range(REQUESTS)]
+    limited = RateLimitMiddleware(_app, store=MemoryStore(), default=Budget(1e9, 10 ** 9))
+
+    baseline = await _run(_app, scopes)
+    overhead = await _run(limited, scopes) - baseline
+    print(f"{REQUESTS} requests from {CLIENTS} clients")
+    print(f"Limiter overhead: {overhead / REQUESTS * 1e6:.2f} us/request")
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,47 @@
+import http.client
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+RUNS = 10
+PORT = 8766
+ROOT = Path(__file__).parent.parent.resolve()
+
+
+def _time_to_first_request(env: dict[str, str]) -> float:
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, "main.py"], cwd=ROOT, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while True:
+            try:
+                conn = http.client.HTTPConnection("127.0.0.1", PORT)
+                conn.request("GET", "/item?limit=1")
+                if conn.getresponse().status == 200:
+                    return time.perf_counter() - start
+            except OSError:
+                time.sleep(0.005)
+            if process.poll() is not None:
+                raise RuntimeError("Server exited before serving a request")
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main() -> None:
+    db_file = Path(tempfile.mkdtemp()) / "bench.sqlite"
+    env = {**os.environ, "DB_PATH": str(db_file), "SERVER_PORT": str(PORT)}
+    # The first run creates the schema, the rest start with an up-to-date one
+    first = _time_to_first_request(env)
+    runs = [_time_to_first_request(env) for _ in range(RUNS)]
+    print(f"Time to first served request, schema creation: {first * 1000:.0f} ms")
+    print(f"Time to first served request, median of {RUNS}: {statistics.median(runs) * 1000:.0f} ms, "
+          f"max {max(runs) * 1000:.0f} ms")
+
+
+if __name__ == '__main__':
+    main()
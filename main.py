@@ -1,4 +1,11 @@
+import argparse
 import logging.config
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+from contextlib import asynccontextmanager, closing
 from datetime import datetime
 from typing import Annotated
 from uuid import uuid4
@@ -9,16 +16,55 @@ from pydantic import BaseModel
 from sqlalchemy import select, and_
 from starlette.responses import JSONResponse, Response
 
-from src import Item, User, base_init, create_session, Tag
-from src.config import DB_PATH, LOGGER_CONFIG
+from src import Item, User, base_init, create_session, replicas_dispose, Tag, job_queue, metrics
+from src.compression import CompressionMiddleware
+from src.config import DB_PATH, DB_REPLICA_PATHS, LOGGER_CONFIG, JOB_DRAIN_TIMEOUT, RATE_LIMIT_DEFAULT, \
+    RATE_LIMITS, RATE_LIMIT_IP_FACTOR, COMPRESSION_MIN_SIZE, COMPRESSION_GZIP_LEVEL, COMPRESSION_BROTLI_QUALITY, \
+    SERVER_HOST, SERVER_PORT, SERVER_TIMEOUT_KEEP_ALIVE, SERVER_BACKLOG
+from src.rate_limit import Budget, MemoryStore, RateLimitMiddleware
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    # Also covers launching with the uvicorn CLI, which skips the __main__ block
+    base_init(DB_PATH, DB_REPLICA_PATHS)
+    await job_queue.start()
+    yield
+    await job_queue.drain(timeout=JOB_DRAIN_TIMEOUT)
+    await replicas_dispose()
+
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(CompressionMiddleware, minimum_size=COMPRESSION_MIN_SIZE, gzip_level=COMPRESSION_GZIP_LEVEL,
+                   brotli_quality=COMPRESSION_BROTLI_QUALITY)
+app.add_middleware(RateLimitMiddleware, store=MemoryStore(), default=Budget(*RATE_LIMIT_DEFAULT),
+                   limits={route: Budget(*budget) for route, budget in RATE_LIMITS.items()},
+                   ip_factor=RATE_LIMIT_IP_FACTOR)
 
 logging.config.dictConfig(LOGGER_CONFIG)
 logger = logging.getLogger("app")
 
 
+@app.get("/metrics", responses={
+    200: {
+        "content": {
+            "application/json": {
+                "example": {
+                    "counters": {"jobs.enqueued": 12, "jobs.done": 12},
+                    "gauges": {"jobs.queue_depth": 0},
+                    "timings": {"jobs.latency": {"count": 12, "sum": 0.06, "max": 0.01}}
+                }
+            }
+        },
+        "description": "Ok"
+    },
+})
+async def get_metrics():
+    return JSONResponse(content=metrics.get_as_dict(), status_code=status.HTTP_200_OK)
+
+
 # Token verifications
+# Only write endpoints check tokens, so it's done on primary to never accept a deleted user's token
 async def user_token_verification(token: Annotated[str | None, Header()] = None) -> int:
     if token is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED)
@@ -54,10 +100,13 @@ async def admin_token_verification(token: Annotated[str | None, Header()] = None
         },
         "description": "User created"
     },
+    429: {
+        "description": "Too many requests"
+    },
 })
 async def create_user(username: str):
-    async with create_session() as session:
-        token = str(uuid4())
+    token = str(uuid4())
+    async with create_session(token=token) as session:
         user = User(username=username, token=token)
         session.add(user)
         await session.flush()
@@ -77,8 +126,9 @@ async def create_user(username: str):
         "description": "User not found"
     },
 })
-async def delete_user_self(user_id=Depends(user_token_verification)):
-    async with create_session() as session:
+async def delete_user_self(token: Annotated[str | None, Header()] = None,
+                           user_id=Depends(user_token_verification)):
+    async with create_session(token=token) as session:
         user = await session.get(User, user_id)
         if not user:
             return status.HTTP_404_NOT_FOUND
@@ -111,8 +161,9 @@ async def _admin_rights_verification(user_id: int) -> bool:
         "description": "User not found"
     },
 })
-async def delete_user(user_id: Annotated[int, Path()], curr_user_id=Depends(user_token_verification)):
-    async with create_session() as session:
+async def delete_user(user_id: Annotated[int, Path()], token: Annotated[str | None, Header()] = None,
+                      curr_user_id=Depends(user_token_verification)):
+    async with create_session(token=token) as session:
         user = await session.get(User, user_id)
         if not user:
             return status.HTTP_404_NOT_FOUND
@@ -142,8 +193,8 @@ async def delete_user(user_id: Annotated[int, Path()], curr_user_id=Depends(user
     },
 })
 async def create_admin(username: str):
-    async with create_session() as session:
-        token = str(uuid4())
+    token = str(uuid4())
+    async with create_session(token=token) as session:
         user = User(username=username, token=token, admin=True)
         session.add(user)
         await session.flush()
@@ -172,12 +223,16 @@ async def create_admin(username: str):
         },
         "description": "Ok"
     },
+    429: {
+        "description": "Too many requests"
+    },
 })
 async def get_items(owner_id: int | None = None, tag_id: int | None = None,
                     price_more_than: float | None = None,
                     price_less_than: float | None = None,
-                    limit: int | None = None, offset: int | None = 0):
-    async with create_session() as session:
+                    limit: int | None = None, offset: int | None = 0,
+                    token: Annotated[str | None, Header()] = None):
+    async with create_session(read_only=True, token=token) as session:
         # Check tag existence
         if tag_id is not None:
             tag = await session.get(Tag, tag_id)
@@ -225,8 +280,8 @@ async def get_items(owner_id: int | None = None, tag_id: int | None = None,
         "description": "Item not found"
     },
 })
-async def get_item(item_id: Annotated[int, Path()]):
-    async with create_session() as session:
+async def get_item(item_id: Annotated[int, Path()], token: Annotated[str | None, Header()] = None):
+    async with create_session(read_only=True, token=token) as session:
         query = select(Item).join(Item.tags).where(Item.item_id == item_id)
         results = (await session.scalars(query)).all()
         if len(results) < 1:
@@ -254,8 +309,9 @@ class PostItem(BaseModel):
         "description": "Not authorized"
     },
 })
-async def post_item(args: PostItem, user_id=Depends(user_token_verification)):
-    async with create_session() as session:
+async def post_item(args: PostItem, token: Annotated[str | None, Header()] = None,
+                    user_id=Depends(user_token_verification)):
+    async with create_session(token=token) as session:
         item = Item(owner_id=user_id, content=args.content,
                     price=args.price, created_at=datetime.now().isoformat(),
                     updated_at=datetime.now().isoformat())
@@ -292,8 +348,9 @@ class PatchItem(BaseModel):
     },
 })
 async def patch_item(args: PatchItem, item_id: Annotated[int, Path()],
+                     token: Annotated[str | None, Header()] = None,
                      user_id=Depends(user_token_verification)):
-    async with create_session() as session:
+    async with create_session(token=token) as session:
         item = await session.get(Item, item_id)
         if item is None:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
@@ -333,8 +390,9 @@ async def patch_item(args: PatchItem, item_id: Annotated[int, Path()],
         "description": "Item not found"
     },
 })
-async def delete_item(item_id: Annotated[int, Path()], user_id=Depends(user_token_verification)):
-    async with create_session() as session:
+async def delete_item(item_id: Annotated[int, Path()], token: Annotated[str | None, Header()] = None,
+                      user_id=Depends(user_token_verification)):
+    async with create_session(token=token) as session:
         item = await session.get(Item, item_id)
         if not item:
             return status.HTTP_404_NOT_FOUND
@@ -348,5 +406,24 @@ async def delete_item(item_id: Annotated[int, Path()], user_id=Depends(user_toke
 
 
 if __name__ == '__main__':
-    base_init(DB_PATH)
-    uvicorn.run("main:app", port=8000, reload=False, log_level="info")
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="report import and init time per phase and exit")
+    if parser.parse_args().profile_startup:
+        # Profiling runs the whole app startup (schema check, pending jobs), so it gets a copy of the database
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_copy = os.path.join(tmp_dir, DB_PATH.name)
+            if DB_PATH.exists():
+                with closing(sqlite3.connect(DB_PATH)) as source, closing(sqlite3.connect(db_copy)) as target:
+                    source.backup(target)
+            # This interpreter has already imported everything, so phases are measured in a fresh one.
+            # The file is run by path, as "-m src.startup" would import the src package before profiling
+            returncode = subprocess.run([sys.executable, "-c", "import runpy; runpy.run_path('src/startup.py', "
+                                                               "run_name='__main__')"],
+                                        cwd=os.path.dirname(os.path.abspath(__file__)),
+                                        env={**os.environ, "DB_PATH": db_copy}).returncode
+        sys.exit(returncode)
+
+    # Passing the app object instead of "main:app" avoids importing this module a second time
+    uvicorn.run(app, host=SERVER_HOST, port=SERVER_PORT, reload=False, log_level="info",
+                timeout_keep_alive=SERVER_TIMEOUT_KEEP_ALIVE, backlog=SERVER_BACKLOG)
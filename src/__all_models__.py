@@ -1,2 +1,3 @@
 from .users import User
 from .items import Item, ItemTag, Tag
+from .jobs import Job
@@ -1,3 +1,5 @@
 from .users import User
 from .items import Item, Tag
-from .db_session import base_init, create_session
+from .jobs import Job, job_queue
+from .metrics import metrics
+from .db_session import base_init, create_session, replica_init, replicas_dispose
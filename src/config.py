@@ -1,6 +1,14 @@
+import os
 from pathlib import Path
 
-DB_PATH = Path(__file__).parent.resolve() / "db/data.sqlite"
+DB_PATH = Path(os.environ.get("DB_PATH", Path(__file__).parent.resolve() / "db/data.sqlite"))
+# Stored in the database as PRAGMA user_version. Bump it when a table is added, so create_all runs;
+# it only creates missing tables, changed columns of existing ones need a manual migration
+SCHEMA_VERSION = 1
+# Read-only copies of DB_PATH, used for read endpoints
+DB_REPLICA_PATHS: list[Path] = []
+# Seconds after a write during which reads of the same token stay on primary
+READ_YOUR_WRITES_WINDOW = 5.0
 
 
 ERROR_LOG_FILENAME = "error.log"
@@ -55,3 +63,33 @@ LOGGER_CONFIG = {
     },
 }
 
+
+JOB_WORKERS = 4
+JOB_MAX_ATTEMPTS = 3
+JOB_RETRY_DELAY = 1.0
+# Seconds to wait for queued jobs on shutdown before cancelling the rest
+JOB_DRAIN_TIMEOUT = 30.0
+# Done jobs older than JOB_RETENTION seconds are deleted every JOB_PRUNE_INTERVAL seconds
+JOB_RETENTION = 24 * 60 * 60
+JOB_PRUNE_INTERVAL = 10 * 60
+
+# Token bucket budgets as (tokens per second, burst), keyed by "METHOD /route/{template}"
+RATE_LIMIT_DEFAULT = (20, 40)
+RATE_LIMITS = {
+    "POST /user": (2, 20),
+    "GET /item": (5, 20),
+    "GET /item/{item_id}": (10, 40),
+}
+# All clients of one IP share a budget RATE_LIMIT_IP_FACTOR times bigger than a single client's one
+RATE_LIMIT_IP_FACTOR = 10
+
+# Responses smaller than COMPRESSION_MIN_SIZE bytes are sent uncompressed,
+# brotli is used only if the optional brotli package is installed
+COMPRESSION_MIN_SIZE = 1024
+COMPRESSION_GZIP_LEVEL = 6
+COMPRESSION_BROTLI_QUALITY = 4
+
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = int(os.environ.get("SERVER_PORT", 8000))
+SERVER_TIMEOUT_KEEP_ALIVE = 30
+SERVER_BACKLOG = 2048
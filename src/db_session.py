@@ -1,15 +1,26 @@
-import asyncio
+import sqlite3
+import time
+from itertools import count
 from pathlib import Path
+from sqlalchemy import event, create_engine
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import Session
 import sqlalchemy.ext.declarative as dec
 
+from src.config import READ_YOUR_WRITES_WINDOW, SCHEMA_VERSION
+from src.metrics import metrics
+
 
 SqlAlchemyBase = dec.declarative_base()
 __factory = None
+__replica_engines = []
+__replica_factories = []
+__replica_counter = count()
+# Ordered from oldest to newest write, tokens are re-inserted on every write
+__last_writes: dict[str, float] = {}
 
 
-def base_init(db_file: Path):
+def base_init(db_file: Path, replica_files: list[Path] | None = None):
     global __factory
     if __factory:
         return
@@ -17,17 +28,82 @@ def base_init(db_file: Path):
         raise Exception("Parent folder doesn't exist")
     conn_str = f'sqlite+aiosqlite:///{db_file}?check_same_thread=False'
     print(f"Connection to base {db_file}\n")
+    schema_init(db_file)
     engine = create_async_engine(conn_str, echo=False)
     __factory = async_sessionmaker(bind=engine, expire_on_commit=False)
+
+    for replica_file in replica_files or []:
+        replica_init(replica_file)
+
+
+def schema_init(db_file: Path) -> bool:
+    # create_all is skipped when the stored schema version is current. A newer one means a newer
+    # deploy has run on this database, and its version must not be overwritten with an older one
+    with sqlite3.connect(db_file) as conn:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version >= SCHEMA_VERSION:
+        return False
+
     import src.__all_models__
+    engine = create_engine(f'sqlite:///{db_file}', echo=False)
+    with engine.begin() as conn:
+        SqlAlchemyBase.metadata.create_all(conn)
+        conn.exec_driver_sql(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    engine.dispose()
+    return True
+
 
-    async def init_models():
-        async with engine.begin() as conn:
-            await conn.run_sync(SqlAlchemyBase.metadata.create_all)
+def replica_init(db_file: Path):
+    # Replicas are expected to be kept in sync with the primary outside the app
+    if not db_file.exists():
+        raise Exception("Replica file doesn't exist")
+    conn_str = f'sqlite+aiosqlite:///file:{db_file}?mode=ro&uri=true&check_same_thread=False'
+    print(f"Connection to replica {db_file}\n")
+    engine = create_async_engine(conn_str, echo=False)
+    __replica_engines.append(engine)
+    __replica_factories.append(async_sessionmaker(bind=engine, expire_on_commit=False))
+
+
+async def replicas_dispose():
+    engines = list(__replica_engines)
+    __replica_engines.clear()
+    __replica_factories.clear()
+    for engine in engines:
+        await engine.dispose()
 
-    asyncio.run(init_models())
+
+@event.listens_for(Session, "after_commit")
+def _record_write(session: Session):
+    token = session.info.get("write_token")
+    if token is None:
+        return
+    now = time.monotonic()
+    __last_writes.pop(token, None)
+    __last_writes[token] = now
+    # Expired writes are at the front, so each one is dropped once in total
+    while __last_writes:
+        oldest = next(iter(__last_writes))
+        if now - __last_writes[oldest] < READ_YOUR_WRITES_WINDOW:
+            break
+        del __last_writes[oldest]
 
 
-def create_session() -> Session:
+def create_session(read_only: bool = False, token: str | None = None) -> Session:
     global __factory
-    return __factory()
+    if not read_only:
+        metrics.inc("db.sessions.primary")
+        if token is None:
+            return __factory()
+        return __factory(info={"write_token": token})
+
+    if not __replica_factories:
+        metrics.inc("db.sessions.primary")
+        return __factory()
+    # Reads right after a write of the same token are served by primary until replicas catch up
+    last_write = __last_writes.get(token) if token is not None else None
+    if last_write is not None and time.monotonic() - last_write < READ_YOUR_WRITES_WINDOW:
+        metrics.inc("db.sessions.primary")
+        metrics.inc("db.sessions.read_your_writes")
+        return __factory()
+    metrics.inc("db.sessions.replica")
+    return __replica_factories[next(__replica_counter) % len(__replica_factories)]()
@@ -0,0 +1,199 @@
+import asyncio
+import json
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable
+
+from sqlalchemy import select, delete, event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Mapped, mapped_column, Session
+
+from src.config import JOB_WORKERS, JOB_MAX_ATTEMPTS, JOB_RETRY_DELAY, JOB_RETENTION, JOB_PRUNE_INTERVAL
+from src.db_session import SqlAlchemyBase, create_session
+from src.metrics import metrics
+
+logger = logging.getLogger("app")
+
+JobHandler = Callable[[dict[str, Any]], Awaitable[None]]
+
+
+class Job(SqlAlchemyBase):
+    __tablename__ = 'jobs'
+    __table_args__ = {'extend_existing': True}
+    job_id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    kind: Mapped[str] = mapped_column(nullable=False)
+    payload: Mapped[str] = mapped_column(nullable=False, default="{}")
+    status: Mapped[str] = mapped_column(nullable=False, default="pending")
+    attempts: Mapped[int] = mapped_column(nullable=False, default=0)
+    last_error: Mapped[str | None] = mapped_column(nullable=True)
+    created_at: Mapped[str] = mapped_column(nullable=False)
+    updated_at: Mapped[str] = mapped_column(nullable=False)
+
+
+class JobQueue:
+    def __init__(self, max_attempts: int = JOB_MAX_ATTEMPTS, retry_delay: float = JOB_RETRY_DELAY):
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.handlers: dict[str, JobHandler] = {}
+        self._queue: asyncio.Queue | None = None
+        self._workers: list[asyncio.Task] = []
+        self._retries: set[asyncio.Task] = set()
+        self._pruner: asyncio.Task | None = None
+
+    @property
+    def running(self) -> bool:
+        return bool(self._workers)
+
+    def handler(self, kind: str) -> Callable[[JobHandler], JobHandler]:
+        def decorator(func: JobHandler) -> JobHandler:
+            self.handlers[kind] = func
+            return func
+        return decorator
+
+    def add(self, session: AsyncSession, kind: str, payload: dict[str, Any] | None = None) -> Job:
+        # The job is written by the caller's commit and handed to workers right after it
+        now = datetime.now().isoformat()
+        job = Job(kind=kind, payload=json.dumps(payload or {}),
+                  status="pending", attempts=0, created_at=now, updated_at=now)
+        session.add(job)
+        session.info.setdefault("queued_jobs", []).append((self, job, time.monotonic()))
+        return job
+
+    async def enqueue(self, kind: str, payload: dict[str, Any] | None = None) -> int:
+        async with create_session() as session:
+            job = self.add(session, kind, payload)
+            await session.commit()
+        return job.job_id
+
+    async def prune(self, retention: float = JOB_RETENTION) -> int:
+        # Failed jobs are kept for inspection
+        cutoff = (datetime.now() - timedelta(seconds=retention)).isoformat()
+        async with create_session() as session:
+            result = await session.execute(delete(Job).where(Job.status == "done", Job.updated_at < cutoff))
+            await session.commit()
+        return result.rowcount
+
+    async def start(self, workers: int = JOB_WORKERS) -> None:
+        if self.running:
+            return
+        self._queue = asyncio.Queue()
+        async with create_session() as session:
+            # Jobs of other kinds are left for a queue that can handle them
+            query = select(Job.job_id).where(Job.status.in_(("pending", "running")),
+                                             Job.kind.in_(self.handlers)).order_by(Job.job_id)
+            job_ids = (await session.scalars(query)).all()
+        for job_id in job_ids:
+            self._put(job_id, time.monotonic())
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(workers)]
+        self._pruner = asyncio.create_task(self._prune_periodically())
+        logger.info(f"Job queue started with {workers} workers, {len(job_ids)} pending jobs")
+
+    async def drain(self, timeout: float | None = None) -> None:
+        if not self.running:
+            return
+
+        async def wait_empty():
+            while True:
+                await self._queue.join()
+                if not self._retries:
+                    return
+                await asyncio.gather(*self._retries, return_exceptions=True)
+
+        try:
+            await asyncio.wait_for(wait_empty(), timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"Job queue drain timed out with {self._queue.qsize()} jobs left")
+        for task in [*self._workers, *self._retries, self._pruner]:
+            task.cancel()
+        await asyncio.gather(*self._workers, *self._retries, self._pruner, return_exceptions=True)
+        self._workers = []
+        self._pruner = None
+        self._retries = set()
+        self._queue = None
+        metrics.set_gauge("jobs.queue_depth", 0)
+
+    def _put(self, job_id: int, enqueued_at: float) -> None:
+        self._queue.put_nowait((job_id, enqueued_at))
+        metrics.set_gauge("jobs.queue_depth", self._queue.qsize())
+
+    async def _retry_later(self, job_id: int, enqueued_at: float, delay: float) -> None:
+        await asyncio.sleep(delay)
+        self._put(job_id, enqueued_at)
+
+    async def _prune_periodically(self) -> None:
+        while True:
+            try:
+                pruned = await self.prune()
+                if pruned:
+                    logger.info(f"Pruned {pruned} done jobs")
+            except Exception:
+                logger.exception("Job pruning failed")
+            await asyncio.sleep(JOB_PRUNE_INTERVAL)
+
+    async def _worker(self) -> None:
+        while True:
+            job_id, enqueued_at = await self._queue.get()
+            metrics.set_gauge("jobs.queue_depth", self._queue.qsize())
+            try:
+                await self._run(job_id, enqueued_at)
+            except Exception:
+                logger.exception(f"Job {job_id} crashed the worker loop")
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job_id: int, enqueued_at: float) -> None:
+        async with create_session() as session:
+            job = await session.get(Job, job_id)
+            if job is None or job.status in ("done", "failed"):
+                return
+            # The attempt and its outcome are written in one commit. A job interrupted
+            # by a crash stays pending and is run again on next start
+            job.attempts += 1
+
+            try:
+                handler = self.handlers.get(job.kind)
+                if handler is None:
+                    raise LookupError(f"No handler for job kind '{job.kind}'")
+                await handler(json.loads(job.payload))
+            except Exception as e:
+                job.last_error = repr(e)
+                job.updated_at = datetime.now().isoformat()
+                if job.attempts < self.max_attempts and job.kind in self.handlers:
+                    job.status = "pending"
+                    await session.commit()
+                    metrics.inc("jobs.retried")
+                    task = asyncio.create_task(
+                        self._retry_later(job_id, enqueued_at, self.retry_delay * job.attempts))
+                    self._retries.add(task)
+                    task.add_done_callback(self._retries.discard)
+                    return
+                job.status = "failed"
+                await session.commit()
+                metrics.inc("jobs.failed")
+                metrics.observe("jobs.latency", time.monotonic() - enqueued_at)
+                logger.error(f"Job {job_id} ({job.kind}) failed after {job.attempts} attempts: {e!r}")
+                return
+
+            job.status = "done"
+            job.updated_at = datetime.now().isoformat()
+            await session.commit()
+        metrics.inc("jobs.done")
+        metrics.observe("jobs.latency", time.monotonic() - enqueued_at)
+
+
+@event.listens_for(Session, "after_commit")
+def _submit_jobs(session: Session):
+    for queue, job, enqueued_at in session.info.pop("queued_jobs", []):
+        metrics.inc("jobs.enqueued")
+        # Without running workers the job stays persisted and is picked up on next start
+        if queue.running:
+            queue._put(job.job_id, enqueued_at)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_jobs(session: Session):
+    session.info.pop("queued_jobs", None)
+
+
+job_queue = JobQueue()
@@ -0,0 +1,38 @@
+from collections import defaultdict
+
+
+class Metrics:
+    def __init__(self):
+        self.counters: dict[str, int] = defaultdict(int)
+        self.gauges: dict[str, float] = {}
+        self.timings: dict[str, dict[str, float]] = {}
+
+    def inc(self, name: str, value: int = 1) -> None:
+        self.counters[name] += value
+
+    def set_gauge(self, name: str, value: float) -> None:
+        self.gauges[name] = value
+
+    def observe(self, name: str, seconds: float) -> None:
+        timing = self.timings.get(name)
+        if timing is None:
+            self.timings[name] = {"count": 1, "sum": seconds, "max": seconds}
+            return
+        timing["count"] += 1
+        timing["sum"] += seconds
+        timing["max"] = max(timing["max"], seconds)
+
+    def reset(self) -> None:
+        self.counters.clear()
+        self.gauges.clear()
+        self.timings.clear()
+
+    def get_as_dict(self) -> dict[str, dict]:
+        return {
+            "counters": dict(self.counters),
+            "gauges": dict(self.gauges),
+            "timings": {name: dict(timing) for name, timing in self.timings.items()},
+        }
+
+
+metrics = Metrics()
@@ -0,0 +1,146 @@
+import math
+from abc import ABC, abstractmethod
+import re
+import time
+from dataclasses import dataclass
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from src.metrics import metrics
+
+
+@dataclass(frozen=True)
+class Budget:
+    rate: float  # tokens refilled per second
+    burst: int  # bucket capacity
+
+
+class RateLimitStore(ABC):
+    # Consumes one token of the key's bucket, returns 0 if allowed or seconds to wait otherwise.
+    # Stores shared between workers (e.g. redis) must do it atomically per key
+    @abstractmethod
+    async def take(self, key: str, budget: Budget) -> float:
+        pass
+
+
+class _Bucket:
+    __slots__ = ("tokens", "stamp", "expires")
+
+    def __init__(self, tokens: float, stamp: float, expires: float):
+        self.tokens = tokens
+        self.stamp = stamp
+        # Time the bucket is full again, after that it's equivalent to a missing one
+        self.expires = expires
+
+
+class MemoryStore(RateLimitStore):
+    def __init__(self, max_keys: int = 100_000, clock=time.monotonic):
+        self.max_keys = max_keys
+        self.clock = clock
+        # Ordered from least to most recently used, buckets are re-inserted on access
+        self._buckets: dict[str, _Bucket] = {}
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    async def take(self, key: str, budget: Budget) -> float:
+        now = self.clock()
+        bucket = self._buckets.pop(key, None)
+        if bucket is None:
+            if len(self._buckets) >= self.max_keys:
+                wait = self._evict(now)
+                if wait > 0:
+                    # Rejecting new keys keeps the budgets of known clients intact
+                    metrics.inc("rate_limit.store_full")
+                    return wait
+            bucket = _Bucket(budget.burst, now, now)
+            tokens = budget.burst
+        else:
+            tokens = min(budget.burst, bucket.tokens + (now - bucket.stamp) * budget.rate)
+
+        bucket.stamp = now
+        if tokens >= 1:
+            tokens -= 1
+            wait = 0
+        else:
+            wait = (1 - tokens) / budget.rate
+        bucket.tokens = tokens
+        bucket.expires = now + (budget.burst - tokens) / budget.rate
+        self._buckets[key] = bucket
+        return wait
+
+    def _evict(self, now: float) -> float:
+        # Returns 0 if the least recently used bucket was evicted, or seconds until it can be
+        key, bucket = next(iter(self._buckets.items()))
+        if bucket.expires > now:
+            return bucket.expires - now
+        del self._buckets[key]
+        return 0
+
+
+class RateLimitMiddleware:
+    def __init__(self, app: ASGIApp, store: RateLimitStore, default: Budget,
+                 limits: dict[str, Budget] | None = None, ip_factor: float = 10):
+        self.app = app
+        self.store = store
+        self.default = default
+        self.limits = limits or {}
+        # Tokens aren't verified here, so all clients of an IP also share a bucket
+        # ip_factor times bigger, otherwise random tokens would bypass the limit
+        self.ip_default = Budget(default.rate * ip_factor, round(default.burst * ip_factor))
+        self.ip_limits = {route: Budget(budget.rate * ip_factor, round(budget.burst * ip_factor))
+                          for route, budget in self.limits.items()}
+        # Built from the app routes on the first request, they are all registered by then
+        self._static_routes: dict[str, str] | None = None
+        self._param_routes: list[tuple[re.Pattern, str]] = []
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        route = self._route(scope)
+        ip, token = self._client(scope)
+        ip_key = f"{route}|{ip}"
+        retry_after = await self.store.take(ip_key, self.ip_limits.get(route, self.ip_default))
+        if retry_after == 0:
+            retry_after = await self.store.take(f"{ip_key}|{token}", self.limits.get(route, self.default))
+        if retry_after > 0:
+            metrics.inc("rate_limit.rejected")
+            response = JSONResponse(content={"detail": "Too Many Requests"}, status_code=429,
+                                    headers={"Retry-After": str(math.ceil(retry_after))})
+            await response(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
+
+    def _route(self, scope: Scope) -> str:
+        # Keyed by route template, so walking /item/{item_id} ids is one budget
+        if self._static_routes is None:
+            self._static_routes = {}
+            for route in scope["app"].router.routes:
+                if getattr(route, "param_convertors", None):
+                    self._param_routes.append((route.path_regex, route.path))
+                elif hasattr(route, "path"):
+                    self._static_routes[route.path] = route.path
+
+        path = scope["path"]
+        template = self._static_routes.get(path)
+        if template is None:
+            for regex, route_path in self._param_routes:
+                if regex.match(path):
+                    template = route_path
+                    break
+            else:
+                # All unknown paths share one budget
+                template = "*"
+        return f"{scope['method']} {template}"
+
+    @staticmethod
+    def _client(scope: Scope) -> tuple[str, str]:
+        client = scope.get("client")
+        ip = client[0] if client else "unknown"
+        for name, value in scope["headers"]:
+            if name == b"token":
+                return ip, value.decode("latin-1")
+        return ip, ""
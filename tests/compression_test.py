@@ -0,0 +1,56 @@
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+from starlette.responses import JSONResponse
+
+from src.compression import CompressionMiddleware
+
+app = FastAPI()
+app.add_middleware(CompressionMiddleware, minimum_size=100)
+
+
+@app.get("/item")
+async def get_items(count: int):
+    return JSONResponse(content=[{"item_id": i, "content": "Some info about item"} for i in range(count)])
+
+
+@pytest.mark.parametrize(
+    "count, accept_encoding, content_encoding",
+    [
+        (100, "gzip", "gzip"),
+        (100, "gzip, deflate", "gzip"),
+        (100, "identity", None),
+        (100, "gzip;q=0", None),
+        (100, "gzip;q=0, identity", None),
+        (100, "*, br;q=0", "gzip"),
+        (100, "*;q=0", None),
+        (1, "gzip", None),
+    ]
+)
+async def test_gzip_compression(count: int, accept_encoding: str, content_encoding: str | None) -> None:
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        response = await ac.get("/item", params={"count": count},
+                                headers={"Accept-Encoding": accept_encoding})
+    assert response.status_code == 200
+    assert response.headers.get("content-encoding") == content_encoding
+    assert len(response.json()) == count
+    if content_encoding is not None:
+        assert int(response.headers["content-length"]) < len(response.content)
+
+
+@pytest.mark.parametrize(
+    "accept_encoding, content_encoding",
+    [
+        ("gzip, br", "br"),
+        ("gzip, br;q=0", "gzip"),
+        ("gzip;q=1.0, br;q=0.5", "gzip"),
+        ("*, gzip;q=0", "br"),
+    ]
+)
+async def test_brotli_compression(accept_encoding: str, content_encoding: str) -> None:
+    pytest.importorskip("brotli")
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        response = await ac.get("/item", params={"count": 100}, headers={"Accept-Encoding": accept_encoding})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == content_encoding
+    assert len(response.json()) == 100
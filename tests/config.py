@@ -1,3 +1,4 @@
 from pathlib import Path
 
 DB_PATH = Path(__file__).parent.resolve() / "db/test_data.sqlite"
+REPLICA_DB_PATH = Path(__file__).parent.resolve() / "db/test_replica.sqlite"
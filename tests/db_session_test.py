@@ -0,0 +1,47 @@
+import sqlite3
+import time
+from pathlib import Path
+
+from sqlalchemy.orm import Session
+
+from src import db_session
+from src.config import SCHEMA_VERSION
+from src.db_session import schema_init
+
+
+def test_schema_init_skips_current_version(tmp_path: Path) -> None:
+    db_file = tmp_path / "schema.sqlite"
+    assert schema_init(db_file)
+    assert not schema_init(db_file)
+
+    with sqlite3.connect(db_file) as conn:
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert {"users", "items", "tags", "item_tags", "jobs"} <= tables
+
+    # Outdated databases get missing tables created
+    with sqlite3.connect(db_file) as conn:
+        conn.execute("DROP TABLE jobs")
+        conn.execute("PRAGMA user_version = 0")
+    assert schema_init(db_file)
+    assert not schema_init(db_file)
+
+
+def test_schema_init_keeps_newer_version(tmp_path: Path) -> None:
+    db_file = tmp_path / "schema.sqlite"
+    with sqlite3.connect(db_file) as conn:
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION + 1}")
+    assert not schema_init(db_file)
+
+    with sqlite3.connect(db_file) as conn:
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION + 1
+
+
+def test_last_writes_pruned(monkeypatch) -> None:
+    now = time.monotonic()
+    last_writes = {"old": now - 100, "expired": now - 20, "fresh": now - 1}
+    monkeypatch.setattr(db_session, "__last_writes", last_writes)
+    monkeypatch.setattr(db_session, "READ_YOUR_WRITES_WINDOW", 10)
+
+    db_session._record_write(Session(info={"write_token": "old"}))
+    assert list(last_writes) == ["fresh", "old"]
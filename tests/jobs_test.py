@@ -0,0 +1,124 @@
+import asyncio
+
+import pytest
+
+from src import base_init, create_session, Job, metrics
+from src.jobs import JobQueue
+from tests.config import DB_PATH
+
+base_init(DB_PATH)
+
+
+@pytest.mark.parametrize(
+    "failures, max_attempts, status, attempts",
+    [
+        (0, 3, "done", 1),
+        (2, 3, "done", 3),
+        (5, 2, "failed", 2),
+    ]
+)
+async def test_job_retries(failures: int, max_attempts: int, status: str, attempts: int) -> None:
+    queue = JobQueue(max_attempts=max_attempts, retry_delay=0)
+    calls = []
+
+    @queue.handler("flaky")
+    async def flaky(payload: dict) -> None:
+        calls.append(payload["value"])
+        if len(calls) <= failures:
+            raise RuntimeError("Temporary failure")
+
+    await queue.start(workers=2)
+    job_id = await queue.enqueue("flaky", {"value": 12})
+    await queue.drain(timeout=5)
+
+    async with create_session() as session:
+        job = await session.get(Job, job_id)
+        assert job.status == status
+        assert job.attempts == attempts
+        await session.delete(job)
+        await session.commit()
+    assert calls == [12] * attempts
+
+
+async def test_pending_jobs_run_on_start() -> None:
+    queue = JobQueue(retry_delay=0)
+    done = []
+
+    @queue.handler("deferred")
+    async def deferred(payload: dict) -> None:
+        done.append(payload["value"])
+
+    # Enqueued before workers exist, so the job only gets persisted
+    job_id = await queue.enqueue("deferred", {"value": 7})
+    assert done == []
+
+    metrics.reset()
+    await queue.start(workers=1)
+    await queue.drain(timeout=5)
+    assert done == [7]
+    assert metrics.counters["jobs.done"] == 1
+    assert metrics.counters["jobs.failed"] == 0
+    assert metrics.timings["jobs.latency"]["count"] == 1
+
+    async with create_session() as session:
+        job = await session.get(Job, job_id)
+        await session.delete(job)
+        await session.commit()
+
+
+@pytest.mark.parametrize("commit", [True, False])
+async def test_job_added_with_transaction(commit: bool) -> None:
+    queue = JobQueue(retry_delay=0)
+    done = []
+
+    @queue.handler("transactional")
+    async def transactional(payload: dict) -> None:
+        done.append(payload["value"])
+
+    await queue.start(workers=1)
+    async with create_session() as session:
+        job = queue.add(session, "transactional", {"value": 3})
+        if commit:
+            await session.commit()
+        else:
+            await session.rollback()
+    await queue.drain(timeout=5)
+    assert done == ([3] if commit else [])
+
+    if commit:
+        async with create_session() as session:
+            await session.delete(await session.get(Job, job.job_id))
+            await session.commit()
+
+
+async def test_prune_done_jobs() -> None:
+    queue = JobQueue(retry_delay=0)
+    job_id = await queue.enqueue("prunable")
+    async with create_session() as session:
+        job = await session.get(Job, job_id)
+        job.status = "done"
+        job.updated_at = "2000-01-01T00:00:00"
+        await session.commit()
+
+    assert await queue.prune() >= 1
+    async with create_session() as session:
+        assert await session.get(Job, job_id) is None
+
+
+async def test_drain_timeout_cancels_stuck_jobs() -> None:
+    queue = JobQueue(retry_delay=0)
+
+    @queue.handler("stuck")
+    async def stuck(payload: dict) -> None:
+        await asyncio.sleep(60)
+
+    await queue.start(workers=1)
+    job_id = await queue.enqueue("stuck")
+    await asyncio.wait_for(queue.drain(timeout=0.1), 5)
+    assert not queue.running
+
+    async with create_session() as session:
+        job = await session.get(Job, job_id)
+        assert job.status == "pending"
+        await session.delete(job)
+        await session.commit()
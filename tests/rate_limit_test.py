@@ -0,0 +1,118 @@
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+
+from src.rate_limit import Budget, MemoryStore, RateLimitMiddleware, RateLimitStore
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _create_app(clock: FakeClock) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(RateLimitMiddleware, store=MemoryStore(clock=clock), default=Budget(10, 10),
+                       limits={"GET /item": Budget(1, 2), "GET /item/{item_id}": Budget(1, 2)}, ip_factor=2)
+
+    @app.get("/item")
+    async def get_items():
+        return []
+
+    @app.get("/item/{item_id}")
+    async def get_item(item_id: int):
+        return {"item_id": item_id}
+
+    @app.get("/user")
+    async def get_users():
+        return []
+
+    return app
+
+
+@pytest.mark.parametrize(
+    "path, headers, allowed",
+    [
+        ("/item", {}, 2),
+        ("/item", {"token": "some_token"}, 2),
+        ("/user", {}, 10),
+    ]
+)
+async def test_rate_limit_budget(path: str, headers: dict[str, str], allowed: int) -> None:
+    clock = FakeClock()
+    async with AsyncClient(app=_create_app(clock), base_url="http://test") as ac:
+        for _ in range(allowed):
+            response = await ac.get(path, headers=headers)
+            assert response.status_code == 200
+        response = await ac.get(path, headers=headers)
+        assert response.status_code == 429
+        assert int(response.headers["Retry-After"]) >= 1
+
+        # Other clients have their own buckets
+        response = await ac.get(path, headers={"token": "other_token"})
+        assert response.status_code == 200
+
+        # Bucket is refilled with time
+        clock.now += 1
+        response = await ac.get(path, headers=headers)
+        assert response.status_code == 200
+
+
+@pytest.mark.parametrize(
+    "paths, allowed, status_code",
+    [
+        ([f"/item/{i}" for i in range(3)], 2, 200),
+        ([f"/missing/{i}" for i in range(11)], 10, 404),
+    ]
+)
+async def test_rate_limit_route_template(paths: list[str], allowed: int, status_code: int) -> None:
+    async with AsyncClient(app=_create_app(FakeClock()), base_url="http://test") as ac:
+        for path in paths[:allowed]:
+            response = await ac.get(path, headers={"token": "some_token"})
+            assert response.status_code == status_code
+        response = await ac.get(paths[allowed], headers={"token": "some_token"})
+        assert response.status_code == 429
+
+
+async def test_random_tokens_share_ip_budget() -> None:
+    async with AsyncClient(app=_create_app(FakeClock()), base_url="http://test") as ac:
+        for i in range(4):
+            response = await ac.get("/item", headers={"token": f"random_token_{i}"})
+            assert response.status_code == 200
+        response = await ac.get("/item", headers={"token": "random_token_4"})
+        assert response.status_code == 429
+
+
+async def test_memory_store_eviction() -> None:
+    clock = FakeClock()
+    store = MemoryStore(max_keys=2, clock=clock)
+    strict = Budget(0.1, 1)
+    loose = Budget(1, 1)
+    assert await store.take("blocked", strict) == 0
+    assert await store.take("blocked", strict) == pytest.approx(10)
+    assert await store.take("a", loose) == 0
+
+    # New keys can't push out a bucket that hasn't refilled yet
+    clock.now += 1
+    assert await store.take("b", loose) == pytest.approx(9)
+    assert await store.take("blocked", strict) == pytest.approx(9)
+    assert len(store) == 2
+
+    # Refilled buckets are evicted least recently used first
+    clock.now += 1
+    assert await store.take("b", loose) == 0
+    assert len(store) == 2
+    assert await store.take("blocked", strict) == pytest.approx(8)
+    clock.now += 10
+    assert await store.take("blocked", strict) == 0
+
+
+def test_store_requires_take() -> None:
+    class IncompleteStore(RateLimitStore):
+        pass
+
+    with pytest.raises(TypeError):
+        IncompleteStore()
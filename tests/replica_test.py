@@ -0,0 +1,70 @@
+import sqlite3
+
+import pytest
+from httpx import AsyncClient
+
+from main import app, PostItem
+from src import base_init, replica_init, replicas_dispose, metrics, db_session
+from tests.config import DB_PATH, REPLICA_DB_PATH
+
+base_init(DB_PATH)
+
+DEFAULT_ITEM = PostItem(tag_ids=[1, 2], content="Some replicated product", price=7.5)
+
+
+def _copy_database() -> None:
+    with sqlite3.connect(DB_PATH) as source, sqlite3.connect(REPLICA_DB_PATH) as target:
+        source.backup(target)
+
+
+@pytest.mark.parametrize(
+    "with_token, window, route",
+    [
+        (True, 60.0, "primary"),
+        (True, 0.0, "replica"),
+        (False, 60.0, "replica"),
+    ]
+)
+async def test_read_routing(monkeypatch, with_token: bool, window: float, route: str) -> None:
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        response = await ac.post("/user", params={"username": "replica_user"})
+        token = response.json()["token"]
+        response = await ac.post("/item", json=DEFAULT_ITEM.model_dump(), headers={"token": token})
+        assert response.status_code == 201
+        item_id = response.json()["item_id"]
+
+        _copy_database()
+        replica_init(REPLICA_DB_PATH)
+        monkeypatch.setattr(db_session, "READ_YOUR_WRITES_WINDOW", window)
+        try:
+            metrics.reset()
+            response = await ac.get(f"/item/{item_id}", headers={"token": token} if with_token else {})
+            assert response.status_code == 200
+            assert response.json()["content"] == DEFAULT_ITEM.content
+            assert metrics.counters[f"db.sessions.{route}"] == 1
+            assert metrics.counters["db.sessions.read_your_writes"] == (route == "primary")
+        finally:
+            await replicas_dispose()
+
+        response = await ac.delete(f"/item/{item_id}", headers={"token": token})
+        assert response.status_code == 204
+        response = await ac.delete("/user", headers={"token": token})
+        assert response.status_code == 204
+
+
+async def test_deleted_token_rejected_on_write(monkeypatch) -> None:
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        response = await ac.post("/user", params={"username": "replica_user"})
+        token = response.json()["token"]
+
+        # Replica still has the user after it's deleted on primary
+        _copy_database()
+        replica_init(REPLICA_DB_PATH)
+        monkeypatch.setattr(db_session, "READ_YOUR_WRITES_WINDOW", 0)
+        try:
+            response = await ac.delete("/user", headers={"token": token})
+            assert response.status_code == 204
+            response = await ac.post("/item", json=DEFAULT_ITEM.model_dump(), headers={"token": token})
+            assert response.status_code == 401
+        finally:
+            await replicas_dispose()